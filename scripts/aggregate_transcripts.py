@@ -91,6 +91,82 @@ def store_meta_data(
     pass
 
 
+def finalize_beddb(conn, page_size=16384):
+    """
+    Rewrite the intervals so that they are clustered by (zoomLevel, startPos)
+    and optimize the database for reading.
+
+    Intervals are inserted in placement order, so the rows returned for a
+    single tile are scattered across the file. Renumbering them in
+    (zoomLevel, startPos) order and storing the id as the rowid makes
+    tile reads mostly sequential page accesses. Tile queries go through
+    the `position_index` rtree and then look up rows by rowid, so no
+    additional indexes are created.
+
+    Note that the new ids start at 1 rather than 0.
+
+    Parameters:
+    -----------
+    conn: sqlite3.Connection
+        An open connection to a beddb file containing the `intervals` and
+        `position_index` tables
+    page_size: int
+        The page size to set before vacuuming the database
+    """
+    c = conn.cursor()
+
+    c.execute(
+        """
+        CREATE TABLE intervals_clustered
+        (
+            id INTEGER PRIMARY KEY,
+            zoomLevel int,
+            importance real,
+            startPos int,
+            endPos int,
+            chrOffset int,
+            uid text,
+            name text,
+            fields text
+        )
+        """
+    )
+
+    # new ids are assigned in (zoomLevel, startPos) order, the old id is
+    # used to break ties so that the renumbering is deterministic
+    c.execute(
+        """
+        INSERT INTO intervals_clustered
+        SELECT NULL, zoomLevel, importance, startPos, endPos,
+            chrOffset, uid, name, fields
+        FROM intervals
+        ORDER BY zoomLevel, startPos, id
+        """
+    )
+
+    # rebuild the rtree so that it refers to the new ids
+    c.execute("DELETE FROM position_index")
+    c.execute(
+        """
+        INSERT INTO position_index
+        SELECT id, zoomLevel, zoomLevel, startPos, endPos
+        FROM intervals_clustered
+        ORDER BY id
+        """
+    )
+
+    c.execute("DROP TABLE intervals")
+    c.execute("ALTER TABLE intervals_clustered RENAME TO intervals")
+
+    conn.commit()
+
+    # the page size only takes effect once the database is rebuilt
+    c.execute("PRAGMA page_size = {}".format(int(page_size)))
+    c.execute("VACUUM")
+    c.execute("ANALYZE")
+    conn.commit()
+
+
 def aggregate_bedfile(
     filepath,
     output_file,
@@ -458,6 +534,9 @@ def aggregate_bedfile(
 
         curr_zoom = 0
     conn.commit()
+
+    finalize_beddb(conn)
+    conn.close()
     return True
 
 @click.command(context_settings=dict(
@@ -0,0 +1,120 @@
+import os.path as op
+import shutil
+import sqlite3
+import sys
+import tempfile
+import click
+
+from aggregate_transcripts import finalize_beddb
+
+# the query used by the beddb tile reader
+TILE_QUERY = """
+    SELECT startPos, endPos, chrOffset, importance, fields, uid, name
+    FROM intervals, position_index
+    WHERE intervals.id=position_index.id
+    AND zoomLevel <= ?
+    AND rEndPos >= ?
+    AND rStartPos <= ?
+"""
+
+# the rtree rounds outwards by up to two times the spacing between 32-bit
+# floats, which is 256 for genome coordinates below 2^32
+FLOAT32_TOLERANCE = 2 * 2 ** (32 - 24)
+
+
+def tile_positions(conn):
+    """
+    List the (zoom, tile_start, tile_end) of every tile that contains the
+    start of an interval, at every zoom level.
+    """
+    (max_zoom, max_width) = conn.execute(
+        "SELECT max_zoom, max_width FROM tileset_info"
+    ).fetchone()
+    start_positions = [r[0] for r in conn.execute("SELECT startPos FROM intervals")]
+
+    tiles = []
+    for zoom in range(max_zoom + 1):
+        tile_width = max_width / 2 ** zoom
+        tile_xs = sorted(set(int(pos // tile_width) for pos in start_positions))
+        tiles += [
+            (zoom, x * tile_width, (x + 1) * tile_width) for x in tile_xs
+        ]
+
+    return tiles
+
+
+def fetch_tiles(conn, tiles):
+    """
+    Run the tile query for each tile. The rows of each tile are sorted
+    because their order is not part of the beddb format.
+    """
+    return [
+        sorted(conn.execute(TILE_QUERY, (zoom, start, end)).fetchall())
+        for (zoom, start, end) in tiles
+    ]
+
+
+def mismatched_ids(conn):
+    """
+    Count the position_index entries that don't match an interval with the
+    same id, zoom level and position. The rtree stores its coordinates as
+    32-bit floats rounded outwards, so positions are allowed to differ by
+    the rounding error.
+    """
+    (num_index,) = conn.execute("SELECT COUNT(*) FROM position_index").fetchone()
+    (num_intervals,) = conn.execute("SELECT COUNT(*) FROM intervals").fetchone()
+    (num_matched,) = conn.execute(
+        """
+        SELECT COUNT(*)
+        FROM intervals, position_index
+        WHERE intervals.id=position_index.id
+        AND intervals.zoomLevel=position_index.rStartZoomLevel
+        AND intervals.zoomLevel=position_index.rEndZoomLevel
+        AND position_index.rStartPos <= intervals.startPos
+        AND position_index.rEndPos >= intervals.endPos
+        AND intervals.startPos - position_index.rStartPos <= ?
+        AND position_index.rEndPos - intervals.endPos <= ?
+        """,
+        (FLOAT32_TOLERANCE, FLOAT32_TOLERANCE),
+    ).fetchone()
+
+    return max(num_index, num_intervals) - num_matched
+
+
+@click.command(context_settings=dict(
+    allow_extra_args=False,
+))
+@click.help_option('--help', '-h')
+@click.option(
+    '-i',
+    '--input-filename',
+    type=str,
+    default=op.join(op.dirname(__file__), '..', 'examples', 'transcripts_test.beddb'),
+)
+def main(**kwargs):
+    # Compare the tile query results of a beddb file before and after
+    # finalize_beddb. The input file itself is not modified.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        beddb_file = op.join(tmp_dir, 'finalized.beddb')
+        shutil.copyfile(kwargs["input_filename"], beddb_file)
+
+        conn = sqlite3.connect(beddb_file)
+        tiles = tile_positions(conn)
+        before = fetch_tiles(conn, tiles)
+
+        finalize_beddb(conn)
+
+        after = fetch_tiles(conn, tiles)
+        num_mismatched = mismatched_ids(conn)
+        conn.close()
+
+    num_different = sum(1 for b, a in zip(before, after) if b != a)
+    print("Tiles checked:", len(tiles))
+    print("Tiles with different results:", num_different)
+    print("Mismatched position_index ids:", num_mismatched)
+
+    if num_different > 0 or num_mismatched > 0:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()